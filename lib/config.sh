@@ -56,6 +56,13 @@ load_config() {
 # Load .env first (so it can override defaults but not caller's vars)
 load_config
 
+# Settings this file defaults; unset them to re-load the config from scratch
+# shellcheck disable=SC2034  # used by pg-import --server
+_PG_CONFIG_VARS="PHOTO_LIBRARY ALBUM_DIR EXPORT_DIR DEFAULT_AUTHOR DEFAULT_COPYRIGHT
+NAMING_PATTERN RAW_PROCESSOR JPEG_QUALITY DARKTABLE_STYLE RAWTHERAPEE_PRESET
+RAW_EXTENSIONS IMAGE_EXTENSIONS CONFIRM_DELETE GENERATE_CHECKSUMS CHECKSUM_ALGORITHM
+FOLDER_STRUCTURE PROMPT_ARCHIVE_DIR SPLIT_BY_TYPE"
+
 # Default values (applied after .env, only if still not set)
 : "${PHOTO_LIBRARY:=$HOME/Pictures/PhotoLibrary}"
 : "${ALBUM_DIR:=$HOME/Pictures/Albums}"
@@ -76,10 +83,13 @@ load_config
 : "${PROMPT_ARCHIVE_DIR:=false}"
 
 # Import layout: RAW in raw/, JPG in jpg/ per date (default). false = flat in date folder.
-case "${SPLIT_BY_TYPE:-true}" in
-    false|0|no|NO) SPLIT_BY_TYPE=false ;;
-    *) SPLIT_BY_TYPE=true ;;
-esac
+normalize_split_by_type() {
+    case "${SPLIT_BY_TYPE:-true}" in
+        false|0|no|NO) SPLIT_BY_TYPE=false ;;
+        *) SPLIT_BY_TYPE=true ;;
+    esac
+}
+normalize_split_by_type
 
 # Load .import.yaml from a directory (typically SD card)
 # Returns key=value pairs on stdout
@@ -105,8 +115,10 @@ import yaml
 import sys
 
 try:
+    # libyaml-backed loader when PyYAML was built with it
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
     with open('$yaml_file', 'r', encoding='utf-8') as f:
-        data = yaml.safe_load(f)
+        data = yaml.load(f, Loader=loader)
     if data:
         for key, value in data.items():
             if isinstance(value, list):
@@ -128,24 +140,33 @@ config_get() {
     echo "$value"
 }
 
+# Check if an extension is in a comma-separated list, ignoring case
+# Uses nocasematch instead of lowercasing with tr, so lookups don't fork
+# (Bash 3.2 has no ${var,,})
+_extension_in_list() {
+    local ext="$1"
+    local list="$2"
+    local found=1
+    
+    if shopt -q nocasematch; then
+        [[ ",$list," == *",$ext,"* ]] && found=0
+    else
+        shopt -s nocasematch
+        [[ ",$list," == *",$ext,"* ]] && found=0
+        shopt -u nocasematch
+    fi
+    
+    return $found
+}
+
 # Check if a file extension is a RAW format
 is_raw_extension() {
-    local ext
-    ext=$(echo "$1" | tr '[:upper:]' '[:lower:]')
-    local raw_exts
-    raw_exts=$(echo "$RAW_EXTENSIONS" | tr '[:upper:]' '[:lower:]')
-    
-    [[ ",$raw_exts," == *",$ext,"* ]]
+    _extension_in_list "$1" "$RAW_EXTENSIONS"
 }
 
 # Check if a file extension is an image format
 is_image_extension() {
-    local ext
-    ext=$(echo "$1" | tr '[:upper:]' '[:lower:]')
-    local img_exts
-    img_exts=$(echo "$IMAGE_EXTENSIONS" | tr '[:upper:]' '[:lower:]')
-    
-    [[ ",$img_exts," == *",$ext,"* ]]
+    _extension_in_list "$1" "$IMAGE_EXTENSIONS"
 }
 
 # Check if a file is a supported format (RAW or image)
@@ -198,17 +198,18 @@ get_basename() {
     echo "${name%.*}"
 }
 
-# Generate checksum for a file
-generate_checksum() {
-    local file="$1"
-    local algorithm="${2:-sha256}"
+# Get the command that hashes files with the given algorithm
+# Output: command words, one per line (sha256sum/shasum/md5sum print
+# "<sum>  <file>" lines, md5 -q prints bare sums)
+_checksum_command() {
+    local algorithm="$1"
     
     case "$algorithm" in
         sha256)
             if command -v sha256sum &>/dev/null; then
-                sha256sum "$file" | cut -d' ' -f1
+                printf '%s\n' sha256sum
             elif command -v shasum &>/dev/null; then
-                shasum -a 256 "$file" | cut -d' ' -f1
+                printf '%s\n' shasum -a 256
             else
                 log_error "No sha256 tool found"
                 return 1
@@ -216,9 +217,9 @@ generate_checksum() {
             ;;
         md5)
             if command -v md5sum &>/dev/null; then
-                md5sum "$file" | cut -d' ' -f1
+                printf '%s\n' md5sum
             elif command -v md5 &>/dev/null; then
-                md5 -q "$file"
+                printf '%s\n' md5 -q
             else
                 log_error "No md5 tool found"
                 return 1
@@ -231,6 +232,54 @@ generate_checksum() {
     esac
 }
 
+# Generate checksum for a file
+generate_checksum() {
+    local file="$1"
+    local algorithm="${2:-sha256}"
+    
+    generate_checksum_list "$algorithm" "$file"
+}
+
+# Generate checksums for many files with a single hashing process
+# Usage: generate_checksum_list <algorithm> <file>...
+# Output: one checksum per file, in argument order
+generate_checksum_list() {
+    local algorithm="$1"
+    shift
+    
+    [[ $# -eq 0 ]] && return 0
+    
+    local hash_cmd=() word
+    while IFS= read -r word; do
+        hash_cmd+=("$word")
+    done < <(_checksum_command "$algorithm")
+    [[ ${#hash_cmd[@]} -eq 0 ]] && return 1
+    
+    local output
+    output=$("${hash_cmd[@]}" "$@") || return 1
+    
+    # Names with special characters get a leading backslash; the sum is
+    # always the first word
+    local line sums=()
+    while IFS= read -r line; do
+        line="${line#\\}"
+        sums+=("${line%% *}")
+    done <<< "$output"
+    
+    if [[ ${#sums[@]} -ne $# ]]; then
+        log_error "Checksum output does not match file list"
+        return 1
+    fi
+    
+    printf '%s\n' "${sums[@]}"
+}
+
+# Get file size in bytes (wc -c stats regular files instead of reading them)
+get_file_size() {
+    local file="$1"
+    wc -c < "$file" | tr -d ' '
+}
+
 # Verify checksum
 verify_checksum() {
     local file="$1"
@@ -253,11 +302,22 @@ safe_copy() {
     cp "$source" "$dest"
     
     if [[ "$verify" == "true" ]]; then
-        local src_sum dest_sum
-        src_sum=$(generate_checksum "$source")
-        dest_sum=$(generate_checksum "$dest")
+        # Compare sizes first; only hash when they match
+        local src_size dest_size verified=false
+        src_size=$(get_file_size "$source")
+        dest_size=$(get_file_size "$dest")
+        if [[ "$src_size" == "$dest_size" ]]; then
+            # Hash both files with one hashing process
+            local sums=() sum
+            while IFS= read -r sum; do
+                sums+=("$sum")
+            done < <(generate_checksum_list "sha256" "$source" "$dest")
+            if [[ ${#sums[@]} -eq 2 && -n "${sums[0]}" && "${sums[0]}" == "${sums[1]}" ]]; then
+                verified=true
+            fi
+        fi
         
-        if [[ "$src_sum" != "$dest_sum" ]]; then
+        if [[ "$verified" != "true" ]]; then
             log_error "Checksum mismatch for: $dest"
             rm -f "$dest"
             return 1
@@ -286,7 +346,10 @@ find_files_by_extension() {
         fi
     done
     
-    find "$dir" -type f \( "${find_args[@]}" \) 2>/dev/null | sort
+    # Name tests first: they need no stat, so find only checks the type
+    # of entries with a matching extension (GNU find reorders this itself,
+    # BSD find on macOS does not)
+    find "$dir" \( "${find_args[@]}" \) -type f 2>/dev/null | sort
 }
 
 # =============================================================================
@@ -375,7 +438,8 @@ sanitize_filename() {
     
     # Replace problematic characters with underscore
     # Keep: alphanumeric, dash, underscore, period
-    echo "$input" | sed -E 's/[^a-zA-Z0-9._-]+/_/g' | sed -E 's/_+/_/g' | sed -E 's/^_|_$//g'
+    # One sed process runs all three passes over each line
+    echo "$input" | sed -E -e 's/[^a-zA-Z0-9._-]+/_/g' -e 's/_+/_/g' -e 's/^_|_$//g'
 }
 
 # Pad a number with leading zeros
@@ -388,7 +452,7 @@ pad_number() {
 
 # =============================================================================
 # Associative Array Simulation (Bash 3.2 compatible)
-# Uses temp files to simulate key-value storage
+# Uses temp files to simulate key-value storage; keys match literally
 # =============================================================================
 
 # Initialize a "map" (creates temp file, echoes path)
@@ -402,16 +466,18 @@ map_set() {
     local key="$2"
     local value="$3"
     
-    # Remove existing key if present
-    if grep -q "^${key}=" "$mapfile" 2>/dev/null; then
-        local tmpfile
-        tmpfile=$(mktemp)
-        grep -v "^${key}=" "$mapfile" > "$tmpfile"
-        mv "$tmpfile" "$mapfile"
+    # Rewrite the file without the old entry using builtins only; maps
+    # hold few keys, so this beats forking grep/mktemp/mv per update
+    local line
+    local entries=()
+    if [[ -f "$mapfile" ]]; then
+        while IFS= read -r line; do
+            [[ "$line" == "${key}="* ]] || entries+=("$line")
+        done < "$mapfile"
     fi
+    entries+=("${key}=${value}")
     
-    # Add new value
-    echo "${key}=${value}" >> "$mapfile"
+    printf '%s\n' "${entries[@]}" > "$mapfile"
 }
 
 # Get value from map: map_get <mapfile> <key> [default]
@@ -420,8 +486,16 @@ map_get() {
     local key="$2"
     local default="${3:-}"
     
-    local value
-    value=$(grep "^${key}=" "$mapfile" 2>/dev/null | head -1 | cut -d= -f2-)
+    local line
+    local value=""
+    if [[ -f "$mapfile" ]]; then
+        while IFS= read -r line; do
+            if [[ "$line" == "${key}="* ]]; then
+                value="${line#"${key}="}"
+                break
+            fi
+        done < "$mapfile"
+    fi
     
     if [[ -n "$value" ]]; then
         echo "$value"
@@ -435,7 +509,12 @@ map_has() {
     local mapfile="$1"
     local key="$2"
     
-    grep -q "^${key}=" "$mapfile" 2>/dev/null
+    local line
+    [[ -f "$mapfile" ]] || return 1
+    while IFS= read -r line; do
+        [[ "$line" == "${key}="* ]] && return 0
+    done < "$mapfile"
+    return 1
 }
 
 # Increment numeric value: map_incr <mapfile> <key>
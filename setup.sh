@@ -81,6 +81,11 @@ pip install -r "${SCRIPT_DIR}/requirements.txt" --quiet
 
 log_success "Dependencies installed"
 
+# Byte-compile lib/ now, so the first pg-* run imports from __pycache__
+# instead of compiling exif_utils.py (fails harmlessly on read-only installs)
+python -m compileall -q "${SCRIPT_DIR}/lib" >/dev/null 2>&1 || \
+    log_warn "Could not byte-compile lib/ (will compile on first use)"
+
 # Check external dependencies
 echo ""
 log_info "Checking external dependencies..."
@@ -3,12 +3,17 @@ Shared pytest fixtures for PixelGroomer tests.
 """
 
 import os
+import re
 import sys
+import shlex
 import shutil
+import functools
+import selectors
 import subprocess
 from pathlib import Path
 from datetime import datetime
-from typing import Generator, Dict, Any
+from itertools import combinations, product
+from typing import Callable, Generator, Dict, Any, List
 
 import pytest
 
@@ -26,17 +31,97 @@ from tests.fixtures.photo_factory import (
 )
 
 
+# =============================================================================
+# Session configuration and option matrices
+# =============================================================================
+
+SHARED_MEM_FS = '/dev/shm'
+
+
+def pytest_configure(config):
+    """Keep temporary test files in RAM (tmpfs) when available."""
+    # Only the temp root moves: pytest still creates a numbered directory
+    # per run below it (pytest-of-<user>/pytest-N) and prunes old ones, so
+    # concurrent runs don't delete each other's files
+    if os.path.isdir(SHARED_MEM_FS) and os.access(SHARED_MEM_FS, os.W_OK):
+        os.environ.setdefault('PYTEST_DEBUG_TEMPROOT', SHARED_MEM_FS)
+
+
+def pytest_addoption(parser):
+    """Register PixelGroomer-specific command line options."""
+    parser.addoption(
+        '--all-combinations',
+        action='store_true',
+        default=False,
+        help='Run option_matrix tests with the full product instead of pairwise cases'
+    )
+
+
+def _value_pairs(combo: tuple) -> set:
+    """Return every (position, value, position, value) pair in a combination."""
+    return {
+        (i, combo[i], j, combo[j])
+        for i, j in combinations(range(len(combo)), 2)
+    }
+
+
+def pairwise(*factors) -> list:
+    """
+    Pick combinations so that every pair of values appears at least once.
+    
+    Greedy covering array: repeatedly take the combination from the full
+    product that covers the most pairs not seen yet. Results keep the
+    order of the full product.
+    """
+    candidates = list(product(*factors))
+    uncovered = set().union(*(_value_pairs(c) for c in candidates))
+    chosen = []
+    
+    while uncovered:
+        best = max(candidates, key=lambda c: len(_value_pairs(c) & uncovered))
+        chosen.append(best)
+        uncovered -= _value_pairs(best)
+    
+    return sorted(chosen, key=candidates.index)
+
+
+def pytest_generate_tests(metafunc):
+    """
+    Parametrize tests marked with option_matrix.
+    
+    Usage:
+        @pytest.mark.option_matrix("has_yaml,verbose", [False, True], [False, True])
+    
+    Runs the pairwise cases by default, the full product with --all-combinations.
+    """
+    marker = metafunc.definition.get_closest_marker('option_matrix')
+    if marker is None:
+        return
+    
+    argnames, *factors = marker.args
+    metafunc.parametrize(argnames, option_matrix_cases(metafunc.config, *factors))
+
+
+def option_matrix_cases(config, *factors) -> list:
+    """Return the cases option_matrix runs for these factors."""
+    if config.getoption('all_combinations'):
+        return list(product(*factors))
+    return pairwise(*factors)
+
+
 # =============================================================================
 # Skip markers for optional dependencies
 # =============================================================================
 
+@functools.lru_cache(maxsize=None)
 def has_darktable() -> bool:
-    """Check if darktable-cli is available."""
+    """Check if darktable-cli is available (looked up once per session)."""
     return shutil.which('darktable-cli') is not None
 
 
+@functools.lru_cache(maxsize=None)
 def has_imagemagick() -> bool:
-    """Check if ImageMagick convert is available."""
+    """Check if ImageMagick convert is available (looked up once per session)."""
     return shutil.which('convert') is not None
 
 
@@ -96,10 +181,9 @@ def non_interactive_env() -> Dict[str, str]:
     return env
 
 
-@pytest.fixture
-def test_env(tmp_path: Path, project_root: Path) -> Dict[str, str]:
+def make_test_env(root: Path) -> Dict[str, str]:
     """
-    Complete test environment with isolated directories.
+    Build the isolated test environment below root.
     
     Sets up:
     - PHOTO_LIBRARY: temp archive directory
@@ -108,9 +192,9 @@ def test_env(tmp_path: Path, project_root: Path) -> Dict[str, str]:
     - PG_NON_INTERACTIVE: enabled
     - PIXELGROOMER_ROOT: project root
     """
-    archive = tmp_path / 'PhotoLibrary'
-    albums = tmp_path / 'Albums'
-    export = tmp_path / 'Export'
+    archive = root / 'PhotoLibrary'
+    albums = root / 'Albums'
+    export = root / 'Export'
     
     archive.mkdir()
     albums.mkdir()
@@ -121,13 +205,19 @@ def test_env(tmp_path: Path, project_root: Path) -> Dict[str, str]:
     env['ALBUM_DIR'] = str(albums)
     env['EXPORT_DIR'] = str(export)
     env['PG_NON_INTERACTIVE'] = '1'
-    env['PIXELGROOMER_ROOT'] = str(project_root)
+    env['PIXELGROOMER_ROOT'] = str(PROJECT_ROOT)
     env['GENERATE_CHECKSUMS'] = 'false'  # Speed up tests
     env['CONFIRM_DELETE'] = 'false'
     
     return env
 
 
+@pytest.fixture
+def test_env(tmp_path: Path) -> Dict[str, str]:
+    """Complete test environment with isolated directories (see make_test_env)."""
+    return make_test_env(tmp_path)
+
+
 # =============================================================================
 # Directory fixtures
 # =============================================================================
@@ -209,8 +299,39 @@ def sample_photos(tmp_path: Path) -> list:
 # SD Card simulation fixtures
 # =============================================================================
 
+@pytest.fixture(scope='session')
+def sd_template_factory(tmp_path_factory) -> Callable[..., Path]:
+    """
+    Mock SD cards built once per session, one per number of photos.
+    
+    fast=True builds the photos from MINIMAL_JPEG with a prebuilt EXIF
+    segment, for tests that only check names, folders or file counts.
+    
+    The contents are read-only; copy the tree before running an import:
+        shutil.copytree(sd_template_factory(2), tmp_path / 'SD_CARD')
+    """
+    cache = {}
+    
+    def _make(num_photos: int, fast: bool = False) -> Path:
+        key = (num_photos, fast)
+        if key not in cache:
+            name = f'sd_template_{num_photos}' + ('_fast' if fast else '')
+            sd_root = tmp_path_factory.mktemp(name)
+            create_sd_card_structure(sd_root, num_photos=num_photos, fast=fast)
+            cache[key] = sd_root
+        return cache[key]
+    
+    return _make
+
+
+@pytest.fixture(scope='session')
+def sd_card_template(sd_template_factory) -> Path:
+    """Mock SD card with two sample photos (read-only, see sd_template_factory)."""
+    return sd_template_factory(2)
+
+
 @pytest.fixture
-def temp_sd_card(tmp_path: Path) -> Path:
+def temp_sd_card(tmp_path: Path, sd_template_factory) -> Path:
     """
     Create a mock SD card with sample photos.
     
@@ -223,19 +344,17 @@ def temp_sd_card(tmp_path: Path) -> Path:
                 └── IMG_1002.JPG
     """
     sd_root = tmp_path / 'SD_CARD'
-    sd_root.mkdir()
-    create_sd_card_structure(sd_root, num_photos=3)
+    shutil.copytree(sd_template_factory(3), sd_root)
     return sd_root
 
 
 @pytest.fixture
-def temp_sd_card_with_yaml(tmp_path: Path) -> Path:
+def temp_sd_card_with_yaml(tmp_path: Path, sd_template_factory) -> Path:
     """
     Create a mock SD card with sample photos and .import.yaml.
     """
     sd_root = tmp_path / 'SD_CARD'
-    sd_root.mkdir()
-    create_sd_card_structure(sd_root, num_photos=3)
+    shutil.copytree(sd_template_factory(3), sd_root)
     create_import_yaml(
         sd_root,
         event='Test Import Event',
@@ -249,11 +368,141 @@ def temp_sd_card_with_yaml(tmp_path: Path) -> Path:
 # Script runner fixtures
 # =============================================================================
 
+class PgImportServer:
+    """
+    Client for a long-lived `pg-import --server` process.
+    
+    Jobs are sent as one line each (fields separated by the ASCII unit
+    separator, leading NAME=value fields are per-job environment) and
+    answered with "<exit code> TAB <stdout file> TAB <stderr file>". The
+    job's full environment is sent; the server runs the job with exactly
+    that environment and loads the configuration again from it.
+    
+    With PG_TEST_SUBPROCESS=1 every job runs as its own pg-import
+    subprocess instead, e.g. to rule out state leaking between jobs.
+    """
+    
+    FIELD_SEP = '\x1f'
+    # Names the server can export (skips e.g. exported Bash functions)
+    ENV_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_]*\Z')
+    
+    def __init__(self, script_path: Path):
+        self.script_path = script_path
+        self.env = os.environ.copy()
+        self.env['PG_NON_INTERACTIVE'] = '1'
+        self.env['PIXELGROOMER_ROOT'] = str(PROJECT_ROOT)
+        self.enabled = os.environ.get('PG_TEST_SUBPROCESS') != '1'
+        self._proc = None
+    
+    def accepts(self, args: list, env: Dict[str, str]) -> bool:
+        """Check that a job can be encoded in the line protocol."""
+        fields = list(args) + [
+            value for key, value in env.items() if self.ENV_NAME.match(key)
+        ]
+        return not any(
+            '\n' in f or self.FIELD_SEP in f for f in fields
+        )
+    
+    def call(self, args: list, env: Dict[str, str],
+             timeout: int = 30) -> subprocess.CompletedProcess:
+        """Run one pg-import job and return its result."""
+        return self.call_batch([(args, env)], timeout=timeout)[0]
+    
+    def call_batch(self, jobs: list,
+                   timeout: int = 30) -> List[subprocess.CompletedProcess]:
+        """
+        Run several pg-import jobs and return their results in order.
+        
+        All (args, env) jobs are written up front, so the server goes from
+        one job to the next without waiting for the test. The timeout
+        applies to each job.
+        """
+        if not self.enabled:
+            return [
+                subprocess.run(
+                    [str(self.script_path)] + list(args),
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout
+                )
+                for args, env in jobs
+            ]
+        
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                [str(self.script_path), '--server'],
+                env=self.env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                # Unbuffered, so the selector never misses a reply that
+                # was already read into a buffer
+                bufsize=0,
+            )
+        
+        batch = []
+        for args, env in jobs:
+            job_env = [
+                f'{key}={value}' for key, value in env.items()
+                if self.ENV_NAME.match(key)
+            ]
+            batch.append(self.FIELD_SEP.join(job_env + list(args)) + '\n')
+        self._proc.stdin.write(''.join(batch).encode())
+        
+        results = []
+        for args, _ in jobs:
+            with selectors.DefaultSelector() as selector:
+                selector.register(self._proc.stdout, selectors.EVENT_READ)
+                if not selector.select(timeout):
+                    self.close()
+                    raise subprocess.TimeoutExpired([str(self.script_path)] + args, timeout)
+            
+            reply = self._proc.stdout.readline().decode()
+            returncode, out_file, err_file = reply.rstrip('\n').split('\t')
+            try:
+                stdout = Path(out_file).read_text(errors='replace')
+                stderr = Path(err_file).read_text(errors='replace')
+            finally:
+                Path(out_file).unlink()
+                Path(err_file).unlink()
+            
+            results.append(subprocess.CompletedProcess(
+                [str(self.script_path)] + args, int(returncode), stdout, stderr
+            ))
+        
+        return results
+    
+    def close(self):
+        """Stop the server process."""
+        if self._proc is None:
+            return
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+        self._proc.stdout.close()
+        self._proc = None
+
+
+@pytest.fixture(scope='session')
+def pg_import_server() -> Generator[PgImportServer, None, None]:
+    """Session-wide pg-import server; started on first use."""
+    server = PgImportServer(PROJECT_ROOT / 'bin' / 'pg-import')
+    yield server
+    server.close()
+
+
 @pytest.fixture
-def run_script(bin_dir: Path, test_env: Dict[str, str]):
+def run_script(bin_dir: Path, test_env: Dict[str, str], pg_import_server: PgImportServer):
     """
     Factory fixture for running pg-* scripts.
     
+    pg-import jobs are routed through the session-wide pg-import server,
+    all other scripts run as a subprocess.
+    
     Usage:
         result = run_script('pg-import', '/path/to/sd', '--event', 'Wedding')
     """
@@ -265,7 +514,14 @@ def run_script(bin_dir: Path, test_env: Dict[str, str]):
         if env:
             merged_env.update(env)
         
-        cmd = [str(script_path)] + list(str(a) for a in args)
+        str_args = list(str(a) for a in args)
+        cmd = [str(script_path)] + str_args
+        
+        if script_name == 'pg-import' and pg_import_server.accepts(str_args, merged_env):
+            result = pg_import_server.call(str_args, merged_env, timeout=timeout)
+            if check:
+                result.check_returncode()
+            return result
         
         return subprocess.run(
             cmd,
@@ -279,6 +535,80 @@ def run_script(bin_dir: Path, test_env: Dict[str, str]):
     return _run
 
 
+class BashSession:
+    """
+    Long-lived Bash process with lib/config.sh (and venv.sh) and
+    lib/utils.sh sourced once.
+    
+    Each snippet runs in a subshell with `set -euo pipefail`, like the
+    pg-* scripts, so failures and variable changes don't leak into the
+    next query. stderr is discarded.
+    """
+    
+    END_MARKER = '__PG_BASH_QUERY_END__'
+    
+    def __init__(self, root: Path):
+        env = os.environ.copy()
+        env['PIXELGROOMER_ROOT'] = str(root)
+        self._proc = subprocess.Popen(
+            ['bash'],
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        self._proc.stdin.write(
+            f'source "{root}/lib/config.sh"\n'
+            f'source "{root}/lib/utils.sh"\n'
+            'set +euo pipefail\n'
+        )
+    
+    def run(self, snippet: str, env: Dict[str, str] = None) -> subprocess.CompletedProcess:
+        """Run a Bash snippet and return its exit code and stdout."""
+        exports = ''.join(
+            f'export {key}={shlex.quote(value)}\n' for key, value in (env or {}).items()
+        )
+        self._proc.stdin.write(
+            f'( set -euo pipefail\n{exports}{snippet}\n) < /dev/null\n'
+            f"printf '\\n%s %s\\n' {self.END_MARKER} $?\n"
+        )
+        self._proc.stdin.flush()
+        
+        lines = []
+        for line in self._proc.stdout:
+            if line.startswith(self.END_MARKER):
+                returncode = int(line.split()[1])
+                break
+            lines.append(line)
+        else:
+            raise RuntimeError('Bash session exited unexpectedly')
+        
+        # Drop the newline printed in front of the end marker
+        stdout = ''.join(lines)[:-1]
+        return subprocess.CompletedProcess(['bash', '-c', snippet], returncode, stdout, '')
+    
+    def close(self):
+        """Stop the Bash process."""
+        self._proc.stdin.close()
+        self._proc.wait()
+        self._proc.stdout.close()
+
+
+@pytest.fixture(scope='session')
+def bash_query() -> Generator[BashSession, None, None]:
+    """
+    Session-wide Bash with the libs sourced, for testing lib functions.
+    
+    Usage:
+        result = bash_query.run('is_raw_extension "cr2" && echo "is_raw=true"')
+        result = bash_query.run(f'load_import_yaml "{sd_card}"')
+    """
+    session = BashSession(PROJECT_ROOT)
+    yield session
+    session.close()
+
+
 @pytest.fixture
 def run_python(project_root: Path):
     """
@@ -311,6 +641,32 @@ def cleanup_env():
     # Any cleanup needed after tests
 
 
+# =============================================================================
+# Archive helpers
+# =============================================================================
+
+JPEG_SUFFIXES = ('.jpg', '.jpeg')
+
+
+def list_jpegs(root) -> List[Path]:
+    """
+    Collect JPEGs below root in a single scandir pass.
+    
+    Matches .jpg/.jpeg case-insensitively, replacing the double
+    rglob('*.jpg') + rglob('*.JPG') walk.
+    """
+    found = []
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(JPEG_SUFFIXES):
+                    found.append(Path(entry.path))
+    return found
+
+
 # =============================================================================
 # Test data helpers
 # =============================================================================
@@ -3,6 +3,8 @@ Synthetic photo factory for test fixtures.
 Creates minimal valid JPEG files with controllable EXIF metadata.
 """
 
+import functools
+import struct
 import subprocess
 import shutil
 from pathlib import Path
@@ -17,8 +19,37 @@ except ImportError:
     HAS_PILLOW = False
 
 
+# Baseline 1x1 grey JPEG (JFIF, standard Huffman tables), for tests that
+# only need a valid file with stable bytes and no EXIF metadata
+MINIMAL_JPEG = bytes.fromhex(
+    'ffd8ffe000104a46494600010100000100010000ffdb00430005030404040305'
+    '04040405050506070c08070707070f0b0b090c110f1212110f111113161c1713'
+    '141a1511111821181a1d1d1f1f1f13172224221e241c1e1f1effc0000b080001'
+    '000101011100ffc4001f00000105010101010101000000000000000001020304'
+    '05060708090a0bffc400b5100002010303020403050504040000017d01020300'
+    '041105122131410613516107227114328191a1082342b1c11552d1f024336272'
+    '82090a161718191a25262728292a3435363738393a434445464748494a535455'
+    '565758595a636465666768696a737475767778797a838485868788898a929394'
+    '95969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4c5c6c7c8c9'
+    'cad2d3d4d5d6d7d8d9dae1e2e3e4e5e6e7e8e9eaf1f2f3f4f5f6f7f8f9faffda'
+    '0008010100003f002bffd9'
+)
+
+
+def jpeg_comment(text: str) -> bytes:
+    """
+    Build a JPEG COM segment holding text.
+    
+    The fast writers put the file name in one, so no two generated files
+    are byte-identical and checksum tests can tell them apart.
+    """
+    payload = text.encode('utf-8')
+    return b'\xff\xfe' + struct.pack('>H', len(payload) + 2) + payload
+
+
+@functools.lru_cache(maxsize=None)
 def has_exiftool() -> bool:
-    """Check if exiftool is available."""
+    """Check if exiftool is available (looked up once per session)."""
     return shutil.which('exiftool') is not None
 
 
@@ -59,6 +90,27 @@ def create_jpeg(
     return path
 
 
+def create_jpeg_fast(path: Path) -> Path:
+    """
+    Write MINIMAL_JPEG to path, without Pillow.
+    
+    For tests that only checksum or count files; the file name is stored
+    in a comment, so every file has its own checksum. Use create_jpeg when
+    image size, content or EXIF matter.
+    
+    Args:
+        path: Output path for the JPEG
+    
+    Returns:
+        Path to created file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # COM goes right after the JFIF APP0 segment (SOI + 18 bytes)
+    path.write_bytes(MINIMAL_JPEG[:20] + jpeg_comment(path.name) + MINIMAL_JPEG[20:])
+    return path
+
+
 def create_jpeg_with_date(
     path: Path,
     date: datetime,
@@ -94,6 +146,85 @@ def create_jpeg_with_date(
     return create_jpeg(path, exif=exif)
 
 
+def _tiff_ifd(entries: list, offset: int) -> tuple:
+    """
+    Pack a little-endian TIFF IFD of ASCII/LONG entries starting at offset.
+    
+    entries are (tag, value) pairs; str values become ASCII, int values LONG.
+    Returns (ifd bytes, data area bytes); the data area follows the IFD.
+    """
+    entries = sorted(entries)
+    data_offset = offset + 2 + 12 * len(entries) + 4
+    ifd = struct.pack('<H', len(entries))
+    data = b''
+    
+    for tag, value in entries:
+        if isinstance(value, int):
+            ifd += struct.pack('<HHII', tag, 4, 1, value)
+            continue
+        raw = value.encode('ascii') + b'\0'
+        if len(raw) <= 4:
+            ifd += struct.pack('<HHI', tag, 2, len(raw)) + raw.ljust(4, b'\0')
+        else:
+            ifd += struct.pack('<HHII', tag, 2, len(raw), data_offset + len(data))
+            data += raw
+    
+    ifd += struct.pack('<I', 0)  # No next IFD
+    return ifd, data
+
+
+def exif_app1(date: datetime, camera: Optional[str] = None) -> bytes:
+    """
+    Build a JPEG APP1 segment with DateTimeOriginal, CreateDate and Model.
+    
+    Args:
+        date: DateTimeOriginal and CreateDate to set
+        camera: Optional camera model
+    
+    Returns:
+        Complete APP1 segment, marker included
+    """
+    stamp = date.strftime('%Y:%m:%d %H:%M:%S')
+    
+    # IFD0 (Model + pointer to the Exif IFD), then the Exif IFD. Pack IFD0
+    # once to learn its size, then again with the real pointer.
+    ifd0_entries = [(0x0110, camera)] if camera else []
+    ifd0, ifd0_data = _tiff_ifd(ifd0_entries + [(0x8769, 0)], 8)
+    exif_offset = 8 + len(ifd0) + len(ifd0_data)
+    ifd0, ifd0_data = _tiff_ifd(ifd0_entries + [(0x8769, exif_offset)], 8)
+    exif_ifd, exif_data = _tiff_ifd([(0x9003, stamp), (0x9004, stamp)], exif_offset)
+    
+    tiff = b'II*\0' + struct.pack('<I', 8) + ifd0 + ifd0_data + exif_ifd + exif_data
+    payload = b'Exif\0\0' + tiff
+    return b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+
+
+def create_jpeg_with_date_fast(
+    path: Path,
+    date: datetime,
+    camera: Optional[str] = None
+) -> Path:
+    """
+    Write MINIMAL_JPEG with an EXIF date, without Pillow or exiftool.
+    
+    Args:
+        path: Output path
+        date: DateTimeOriginal to set
+        camera: Optional camera model
+    
+    Returns:
+        Path to created file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # APP1 and COM go right after the JFIF APP0 segment (SOI + 18 bytes)
+    path.write_bytes(
+        MINIMAL_JPEG[:20] + exif_app1(date, camera) + jpeg_comment(path.name)
+        + MINIMAL_JPEG[20:]
+    )
+    return path
+
+
 def create_raw_like(path: Path, extension: str = 'cr3') -> Path:
     """
     Create a file that mimics a RAW file structure.
@@ -203,13 +334,16 @@ def get_exif(path: Path, field: str) -> Optional[str]:
         return None
 
 
-def create_sd_card_structure(base_path: Path, num_photos: int = 3) -> Path:
+def create_sd_card_structure(base_path: Path, num_photos: int = 3,
+                             fast: bool = False) -> Path:
     """
     Create a mock SD card directory structure with sample photos.
     
     Args:
         base_path: Base directory for the SD card
         num_photos: Number of sample photos to create
+        fast: Write MINIMAL_JPEG with a prebuilt EXIF segment instead of
+            encoding with Pillow and tagging with exiftool
     
     Returns:
         Path to DCIM directory
@@ -218,6 +352,7 @@ def create_sd_card_structure(base_path: Path, num_photos: int = 3) -> Path:
     dcim.mkdir(parents=True, exist_ok=True)
     
     base_date = datetime(2026, 1, 24, 10, 0, 0)
+    create = create_jpeg_with_date_fast if fast else create_jpeg_with_date
     
     for i in range(num_photos):
         photo_date = datetime(
@@ -229,7 +364,7 @@ def create_sd_card_structure(base_path: Path, num_photos: int = 3) -> Path:
             base_date.second
         )
         
-        create_jpeg_with_date(
+        create(
             dcim / f'IMG_{1000 + i:04d}.JPG',
             date=photo_date,
             camera='Canon EOS R5'
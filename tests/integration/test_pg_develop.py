@@ -13,6 +13,33 @@ from tests.conftest import requires_exiftool, requires_pillow, requires_imagemag
 from tests.fixtures.photo_factory import create_jpeg, create_raw_like
 
 
+@pytest.fixture
+def fake_convert(tmp_path: Path, test_env):
+    """
+    Stand-in for ImageMagick's convert that copies its input and logs
+    every output path, so tests can check which files were written.
+    
+    Returns (env, log) for run_script.
+    """
+    bin_dir = tmp_path / 'fakebin'
+    bin_dir.mkdir()
+    log = tmp_path / 'convert.log'
+    log.touch()
+    convert = bin_dir / 'convert'
+    convert.write_text(
+        '#!/bin/sh\n'
+        'for out; do :; done\n'
+        'sleep 0.2\n'
+        'cp "$1" "$out"\n'
+        f'echo "$out" >> "{log}"\n'
+    )
+    convert.chmod(0o755)
+    
+    env = test_env.copy()
+    env['PATH'] = f"{bin_dir}{os.pathsep}{env.get('PATH', '')}"
+    return env, log
+
+
 class TestPgDevelopBasic:
     """Basic functionality tests for pg-develop."""
     
@@ -36,6 +63,13 @@ class TestPgDevelopBasic:
         assert 'USAGE' in result.stdout or 'usage' in result.stdout.lower()
         assert '--processor' in result.stdout
         assert '--quality' in result.stdout
+    
+    def test_develop_rejects_invalid_jobs(self, run_script, tmp_path: Path):
+        """pg-develop rejects a --jobs value that is not a positive number."""
+        result = run_script('pg-develop', str(tmp_path), '--jobs', '0')
+        
+        assert result.returncode != 0
+        assert 'Invalid --jobs' in result.stderr
 
 
 class TestPgDevelopImageMagick:
@@ -97,6 +131,58 @@ class TestPgDevelopImageMagick:
         # Script should complete without crashing
         output = result.stdout + result.stderr
         assert 'Development complete' in output or 'Processing' in output
+    
+    def test_develop_parallel_jobs(self, run_script, tmp_path: Path, fake_convert):
+        """pg-develop --jobs develops every file exactly once."""
+        env, log = fake_convert
+        raw_dir = tmp_path / 'raws'
+        raw_dir.mkdir()
+        for i in range(4):
+            (raw_dir / f'parallel_{i}.cr3').write_bytes(b'RAW')
+        output_dir = tmp_path / 'output'
+        output_dir.mkdir()
+        
+        result = run_script(
+            'pg-develop', str(raw_dir),
+            '--processor', 'imagemagick',
+            '--jobs', '2',
+            '--output', str(output_dir),
+            env=env
+        )
+        
+        assert result.returncode == 0
+        expected = sorted(str(output_dir / f'parallel_{i}.jpg') for i in range(4))
+        assert sorted(log.read_text().splitlines()) == expected
+        for path in expected:
+            assert Path(path).is_file()
+        assert 'Successful: 4' in result.stdout + result.stderr
+    
+    def test_develop_parallel_jobs_same_basename(self, run_script, tmp_path: Path, fake_convert):
+        """Inputs that map to the same output are developed only once."""
+        env, log = fake_convert
+        raw_dir = tmp_path / 'raws'
+        raw_dir.mkdir()
+        for name in ('IMG_0001.cr3', 'IMG_0001.nef', 'IMG_0002.cr3'):
+            (raw_dir / name).write_bytes(b'RAW')
+        output_dir = tmp_path / 'output'
+        output_dir.mkdir()
+        
+        result = run_script(
+            'pg-develop', str(raw_dir),
+            '--processor', 'imagemagick',
+            '--jobs', '2',
+            '--output', str(output_dir),
+            env=env
+        )
+        
+        output = result.stdout + result.stderr
+        assert result.returncode == 0
+        assert sorted(log.read_text().splitlines()) == [
+            str(output_dir / 'IMG_0001.jpg'),
+            str(output_dir / 'IMG_0002.jpg'),
+        ]
+        assert 'Successful: 2' in output
+        assert 'Skipped: 1' in output
 
 
 class TestPgDevelopDarktable:
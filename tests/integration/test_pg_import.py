@@ -2,17 +2,18 @@
 Integration tests for pg-import script.
 """
 
+import hashlib
 import os
 import re
+import shutil
 import subprocess
 from pathlib import Path
 from datetime import datetime
 
 import pytest
 
-from tests.conftest import requires_exiftool, requires_pillow
+from tests.conftest import requires_exiftool, requires_pillow, list_jpegs
 from tests.fixtures.photo_factory import (
-    create_sd_card_structure,
     create_import_yaml,
     create_jpeg_with_date,
     get_exif,
@@ -81,7 +82,7 @@ class TestPgImportBasic:
         
         # Find imported files
         archive_path = Path(archive_dir)
-        imported_files = list(archive_path.rglob('*.jpg')) + list(archive_path.rglob('*.JPG'))
+        imported_files = list_jpegs(archive_path)
         
         assert len(imported_files) > 0
         
@@ -217,7 +218,7 @@ class TestPgImportSplitByType:
         assert result.returncode == 0
         archive = Path(test_env['PHOTO_LIBRARY'])
         raws = list((archive).rglob('raw/*.CR3')) + list(archive.rglob('raw/*.cr3'))
-        jpgs = list(archive.rglob('jpg/*.jpg')) + list(archive.rglob('jpg/*.JPG'))
+        jpgs = [f for f in list_jpegs(archive) if f.parent.name == 'jpg']
         assert len(raws) == 1 and len(jpgs) == 1
         # Same sequence suffix (EXIF date may differ between mock JPG and RAW)
         assert raws[0].stem.rsplit('_', 1)[-1] == jpgs[0].stem.rsplit('_', 1)[-1]
@@ -254,7 +255,7 @@ class TestPgImportSplitByType:
                 continue
             assert not (date_dir / 'jpg').is_dir(), 'flat layout must not use jpg/'
             assert not (date_dir / 'raw').is_dir(), 'flat layout must not use raw/'
-        jpgs = list(archive.rglob('*.jpg')) + list(archive.rglob('*.JPG'))
+        jpgs = list_jpegs(archive)
         raws = (
             list(archive.rglob('*.cr3'))
             + list(archive.rglob('*.CR3'))
@@ -334,7 +335,7 @@ class TestPgImportWithEvent:
         
         # Check EXIF on imported files
         archive_path = Path(archive_dir)
-        imported_files = list(archive_path.rglob('*.jpg')) + list(archive_path.rglob('*.JPG'))
+        imported_files = list_jpegs(archive_path)
         
         if imported_files:
             event = get_exif(imported_files[0], 'XMP:Event')
@@ -376,18 +377,17 @@ class TestPgImportWithYaml:
         
         # Check files use CLI event name
         archive_path = Path(archive_dir)
-        imported_files = list(archive_path.rglob('*.jpg')) + list(archive_path.rglob('*.JPG'))
+        imported_files = list_jpegs(archive_path)
         
         for f in imported_files:
             assert 'CLIOverride' in f.name
 
     @requires_exiftool
     @requires_pillow
-    def test_identity_yaml_sets_artist_copyright_credit(self, run_script, tmp_path: Path, test_env):
+    def test_identity_yaml_sets_artist_copyright_credit(self, run_script, tmp_path: Path, test_env, sd_card_template: Path):
         """pg-import with .import.yaml (author, copyright, credit only) sets Artist, Copyright, IPTC:Credit."""
         sd_root = tmp_path / 'SD_IDENTITY'
-        sd_root.mkdir()
-        create_sd_card_structure(sd_root, num_photos=2)
+        shutil.copytree(sd_card_template, sd_root)
         create_import_yaml(
             sd_root,
             author='IdentityAuthor',
@@ -408,7 +408,7 @@ class TestPgImportWithYaml:
         assert result.returncode == 0
 
         archive_path = Path(archive_dir)
-        imported = list(archive_path.rglob('*.jpg')) + list(archive_path.rglob('*.JPG'))
+        imported = list_jpegs(archive_path)
         assert len(imported) > 0
 
         sample = imported[0]
@@ -492,6 +492,41 @@ class TestPgImportChecksums:
         
         # May or may not have checksums depending on config
         # The important thing is the import succeeded
+    
+    @requires_exiftool
+    def test_checksums_match_imported_files(self, run_script, tmp_path: Path,
+                                            sd_template_factory, test_env):
+        """Every .checksums line holds the hash of the file it names."""
+        sd_card = tmp_path / 'SD_CARD'
+        shutil.copytree(sd_template_factory(3, fast=True), sd_card)
+        env = test_env.copy()
+        env['GENERATE_CHECKSUMS'] = 'true'
+        env['CHECKSUM_ALGORITHM'] = 'sha256'
+        
+        result = run_script(
+            'pg-import', str(sd_card),
+            '--event', 'ChecksumTest',
+            '--no-delete',
+            env=env
+        )
+        
+        assert result.returncode == 0
+        checksum_files = list(Path(env['PHOTO_LIBRARY']).rglob('.checksums'))
+        assert checksum_files
+        
+        checked = 0
+        for checksum_file in checksum_files:
+            folder = checksum_file.parent
+            lines = checksum_file.read_text().splitlines()
+            stored = dict(reversed(line.split('  ', 1)) for line in lines)
+            assert len(stored) == len(lines)
+            assert stored == {
+                f.name: hashlib.sha256(f.read_bytes()).hexdigest()
+                for f in folder.iterdir()
+                if f.is_file() and f.name != '.checksums'
+            }
+            checked += len(stored)
+        assert checked == 3
 
 
 class TestPgImportFolderStructure:
@@ -570,6 +605,98 @@ class TestPgImportHelp:
         assert 'error' in result.stderr.lower() or 'required' in result.stderr.lower()
 
 
+class TestPgImportServer:
+    """Tests for pg-import --server batch mode."""
+    
+    def test_help_mentions_server(self, run_script):
+        """pg-import --help documents --server."""
+        result = run_script('pg-import', '--help')
+        
+        assert result.returncode == 0
+        assert '--server' in result.stdout
+    
+    def test_server_answers_each_job(self, bin_dir: Path, test_env, tmp_path: Path):
+        """pg-import --server runs every job and reports its exit code and output."""
+        job_env = [f'{key}={value}' for key, value in test_env.items() if '%' not in key]
+        jobs = [
+            job_env + ['--help'],
+            job_env + [f'PHOTO_LIBRARY={tmp_path}', '/nonexistent/path/to/sd', '--event', 'X'],
+        ]
+        stdin = ''.join('\x1f'.join(job) + '\n' for job in jobs)
+        
+        result = subprocess.run(
+            [str(bin_dir / 'pg-import'), '--server'],
+            input=stdin,
+            env=test_env,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        
+        assert result.returncode == 0
+        statuses = [line.split('\t') for line in result.stdout.splitlines()]
+        assert len(statuses) == 2
+        
+        outputs = []
+        for returncode, out_file, err_file in statuses:
+            outputs.append((int(returncode), Path(out_file).read_text(), Path(err_file).read_text()))
+            Path(out_file).unlink()
+            Path(err_file).unlink()
+        
+        assert outputs[0][0] == 0
+        assert 'USAGE' in outputs[0][1]
+        assert outputs[1][0] != 0
+        assert 'not exist' in outputs[1][2].lower()
+    
+    @requires_exiftool
+    def test_server_job_does_not_inherit_server_env(self, bin_dir: Path, test_env, tmp_path: Path):
+        """A variable missing from the job's environment falls back to the config default."""
+        source = tmp_path / 'sd'
+        source.mkdir()
+        server_env = test_env.copy()
+        server_env['PHOTO_LIBRARY'] = str(tmp_path / 'server_library')
+        job_env = {
+            key: value for key, value in test_env.items()
+            if key != 'PHOTO_LIBRARY' and '%' not in key
+        }
+        job_env['HOME'] = str(tmp_path)
+        fields = [f'{key}={value}' for key, value in job_env.items()]
+        fields += [str(source), '--dry-run', '--event', 'X']
+        
+        result = subprocess.run(
+            [str(bin_dir / 'pg-import'), '--server'],
+            input='\x1f'.join(fields) + '\n',
+            env=server_env,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        
+        assert result.returncode == 0
+        _, out_file, err_file = result.stdout.rstrip('\n').split('\t')
+        output = Path(out_file).read_text() + Path(err_file).read_text()
+        Path(out_file).unlink()
+        Path(err_file).unlink()
+        
+        assert 'server_library' not in output
+        assert str(tmp_path / 'Pictures' / 'PhotoLibrary') in output
+    
+    def test_server_keeps_trailing_empty_argument(self, run_script):
+        """An empty last argument reaches pg-import like in a direct run."""
+        result = run_script('pg-import', '/nonexistent/path/to/sd', '--event', '')
+        
+        assert result.returncode != 0
+        assert 'unbound variable' not in result.stderr
+        assert 'not exist' in result.stderr.lower()
+    
+    def test_server_rejects_extra_arguments(self, run_script, tmp_path: Path):
+        """--server combined with other arguments is an unknown option."""
+        result = run_script('pg-import', str(tmp_path), '--server')
+        
+        assert result.returncode != 0
+        assert 'Unknown option' in result.stderr
+
+
 class TestPgImportEdgeCases:
     """Edge case tests for pg-import."""
     
@@ -656,21 +783,20 @@ class TestPgImportTrip:
         assert result.returncode == 0
 
         archive_path = Path(archive_dir)
-        imported = list(archive_path.rglob('*.jpg')) + list(archive_path.rglob('*.JPG'))
+        imported = list_jpegs(archive_path)
         assert len(imported) > 0
 
         # Filenames should be YYYYMMDD_NNN.ext (e.g. 20260124_001.jpg)
-        pattern = re.compile(r'^\d{8}_\d{3}\.(?:jpg|JPG)$')
+        pattern = re.compile(r'^\d{8}_\d{3}\.jpg$', re.IGNORECASE)
         for f in imported:
             assert pattern.match(f.name), f"Expected date_seq.ext, got {f.name}"
 
     @requires_exiftool
     @requires_pillow
-    def test_trip_mode_event_from_yaml(self, run_script, tmp_path: Path, test_env):
+    def test_trip_mode_event_from_yaml(self, run_script, tmp_path: Path, test_env, sd_card_template: Path):
         """pg-import --trip with event in .import.yaml uses event in filename."""
         sd_root = tmp_path / 'SD_CARD'
-        sd_root.mkdir()
-        create_sd_card_structure(sd_root, num_photos=2)
+        shutil.copytree(sd_card_template, sd_root)
         create_import_yaml(sd_root, event='AlpsTour', location='Sölk Pass')
 
         archive_dir = test_env['PHOTO_LIBRARY']
@@ -686,7 +812,7 @@ class TestPgImportTrip:
         assert result.returncode == 0
 
         archive_path = Path(archive_dir)
-        imported = list(archive_path.rglob('*.jpg')) + list(archive_path.rglob('*.JPG'))
+        imported = list_jpegs(archive_path)
         assert len(imported) > 0
 
         for f in imported:
@@ -2,20 +2,20 @@
 Integration tests for pg-verify script.
 """
 
+import hashlib
 import os
+import re
 import subprocess
 from pathlib import Path
 
 import pytest
 
-from tests.conftest import requires_pillow
-from tests.fixtures.photo_factory import create_jpeg
+from tests.fixtures.photo_factory import create_jpeg_fast
 
 
 class TestPgVerifyGenerate:
     """Tests for pg-verify --generate mode."""
     
-    @requires_pillow
     def test_generate_creates_checksum_file(self, run_script, tmp_path: Path, test_env):
         """pg-verify --generate creates .checksums file."""
         photo_dir = tmp_path / 'photos'
@@ -23,7 +23,7 @@ class TestPgVerifyGenerate:
         
         # Create some photos
         for i in range(3):
-            create_jpeg(photo_dir / f'photo_{i}.jpg')
+            create_jpeg_fast(photo_dir / f'photo_{i}.jpg')
         
         result = run_script('pg-verify', str(photo_dir), '--generate')
         
@@ -42,7 +42,6 @@ class TestPgVerifyGenerate:
         for line in lines:
             assert '  ' in line  # Two spaces between hash and filename
     
-    @requires_pillow
     def test_generate_recursive(self, run_script, tmp_path: Path, test_env):
         """pg-verify --generate processes subdirectories."""
         base_dir = tmp_path / 'photos'
@@ -50,8 +49,8 @@ class TestPgVerifyGenerate:
         base_dir.mkdir()
         sub_dir.mkdir()
         
-        create_jpeg(base_dir / 'top.jpg')
-        create_jpeg(sub_dir / 'nested.jpg')
+        create_jpeg_fast(base_dir / 'top.jpg')
+        create_jpeg_fast(sub_dir / 'nested.jpg')
         
         result = run_script('pg-verify', str(base_dir), '--generate')
         
@@ -61,7 +60,6 @@ class TestPgVerifyGenerate:
         assert (base_dir / '.checksums').exists()
         assert (sub_dir / '.checksums').exists()
     
-    @requires_pillow
     def test_generate_no_recursive(self, run_script, tmp_path: Path, test_env):
         """pg-verify --generate --no-recursive only processes top level."""
         base_dir = tmp_path / 'photos'
@@ -69,8 +67,8 @@ class TestPgVerifyGenerate:
         base_dir.mkdir()
         sub_dir.mkdir()
         
-        create_jpeg(base_dir / 'top.jpg')
-        create_jpeg(sub_dir / 'nested.jpg')
+        create_jpeg_fast(base_dir / 'top.jpg')
+        create_jpeg_fast(sub_dir / 'nested.jpg')
         
         result = run_script('pg-verify', str(base_dir), '--generate', '--no-recursive')
         
@@ -84,13 +82,12 @@ class TestPgVerifyGenerate:
 class TestPgVerifyCheck:
     """Tests for pg-verify --check mode."""
     
-    @requires_pillow
     def test_check_valid_files(self, run_script, tmp_path: Path, test_env):
         """pg-verify --check passes for unmodified files."""
         photo_dir = tmp_path / 'photos'
         photo_dir.mkdir()
         
-        photos = [create_jpeg(photo_dir / f'photo_{i}.jpg') for i in range(3)]
+        photos = [create_jpeg_fast(photo_dir / f'photo_{i}.jpg') for i in range(3)]
         
         # Generate checksums first
         run_script('pg-verify', str(photo_dir), '--generate')
@@ -102,13 +99,12 @@ class TestPgVerifyCheck:
         output = result.stdout.lower() + result.stderr.lower()
         assert 'verified' in output or 'ok' in output or 'success' in output
     
-    @requires_pillow
     def test_check_detects_modified(self, run_script, tmp_path: Path, test_env):
         """pg-verify --check detects modified files."""
         photo_dir = tmp_path / 'photos'
         photo_dir.mkdir()
         
-        photo = create_jpeg(photo_dir / 'test.jpg')
+        photo = create_jpeg_fast(photo_dir / 'test.jpg')
         
         # Generate checksums
         run_script('pg-verify', str(photo_dir), '--generate')
@@ -125,13 +121,30 @@ class TestPgVerifyCheck:
         output = result.stdout.lower() + result.stderr.lower()
         assert 'mismatch' in output or 'failed' in output
     
-    @requires_pillow
+    def test_check_reports_only_the_modified_file(self, run_script, tmp_path: Path, test_env):
+        """pg-verify --check names exactly the one modified file among several."""
+        photo_dir = tmp_path / 'photos'
+        photo_dir.mkdir()
+        
+        photos = [create_jpeg_fast(photo_dir / f'photo_{i}.jpg') for i in range(5)]
+        run_script('pg-verify', str(photo_dir), '--generate')
+        
+        with open(photos[2], 'ab') as f:
+            f.write(b'corrupted data')
+        
+        result = run_script('pg-verify', str(photo_dir), '--check', '--verbose')
+        
+        assert result.returncode != 0
+        output = result.stdout + result.stderr
+        assert 'FAILED: 1' in output
+        assert re.findall(r'MISMATCH: (\S+)', output) == ['photo_2.jpg']
+    
     def test_check_detects_missing(self, run_script, tmp_path: Path, test_env):
         """pg-verify --check detects missing files."""
         photo_dir = tmp_path / 'photos'
         photo_dir.mkdir()
         
-        photo = create_jpeg(photo_dir / 'test.jpg')
+        photo = create_jpeg_fast(photo_dir / 'test.jpg')
         
         # Generate checksums
         run_script('pg-verify', str(photo_dir), '--generate')
@@ -146,13 +159,12 @@ class TestPgVerifyCheck:
         output = result.stdout.lower() + result.stderr.lower()
         assert 'missing' in output or 'failed' in output
     
-    @requires_pillow
     def test_check_no_checksum_file(self, run_script, tmp_path: Path, test_env):
         """pg-verify --check handles missing .checksums file."""
         photo_dir = tmp_path / 'photos'
         photo_dir.mkdir()
         
-        create_jpeg(photo_dir / 'test.jpg')
+        create_jpeg_fast(photo_dir / 'test.jpg')
         
         # Don't generate checksums
         result = run_script('pg-verify', str(photo_dir), '--check')
@@ -164,18 +176,17 @@ class TestPgVerifyCheck:
 class TestPgVerifyUpdate:
     """Tests for pg-verify --update mode."""
     
-    @requires_pillow
     def test_update_adds_new_files(self, run_script, tmp_path: Path, test_env):
         """pg-verify --update adds checksums for new files."""
         photo_dir = tmp_path / 'photos'
         photo_dir.mkdir()
         
         # Create initial photos and generate checksums
-        create_jpeg(photo_dir / 'initial.jpg')
+        create_jpeg_fast(photo_dir / 'initial.jpg')
         run_script('pg-verify', str(photo_dir), '--generate')
         
         # Add a new photo
-        create_jpeg(photo_dir / 'new_photo.jpg')
+        create_jpeg_fast(photo_dir / 'new_photo.jpg')
         
         # Update should add the new file
         result = run_script('pg-verify', str(photo_dir), '--update')
@@ -189,13 +200,12 @@ class TestPgVerifyUpdate:
         assert 'initial.jpg' in content
         assert 'new_photo.jpg' in content
     
-    @requires_pillow
     def test_update_preserves_existing(self, run_script, tmp_path: Path, test_env):
         """pg-verify --update keeps existing checksums."""
         photo_dir = tmp_path / 'photos'
         photo_dir.mkdir()
         
-        create_jpeg(photo_dir / 'existing.jpg')
+        create_jpeg_fast(photo_dir / 'existing.jpg')
         run_script('pg-verify', str(photo_dir), '--generate')
         
         # Get original checksum
@@ -204,12 +214,34 @@ class TestPgVerifyUpdate:
         original_hash = original_content.split()[0]
         
         # Add new file and update
-        create_jpeg(photo_dir / 'new.jpg')
+        create_jpeg_fast(photo_dir / 'new.jpg')
         run_script('pg-verify', str(photo_dir), '--update')
         
         # Existing checksum should be unchanged
         updated_content = checksum_file.read_text()
         assert original_hash in updated_content
+    
+    def test_update_keeps_each_file_with_its_own_checksum(self, run_script, tmp_path: Path, test_env):
+        """Every .checksums line after --update holds that file's own hash."""
+        photo_dir = tmp_path / 'photos'
+        photo_dir.mkdir()
+        env = {'CHECKSUM_ALGORITHM': 'sha256'}
+        
+        for name in ('c.jpg', 'a.jpg', 'e.jpg'):
+            create_jpeg_fast(photo_dir / name)
+        run_script('pg-verify', str(photo_dir), '--generate', env=env)
+        for name in ('b.jpg', 'd.jpg'):
+            create_jpeg_fast(photo_dir / name)
+        
+        result = run_script('pg-verify', str(photo_dir), '--update', env=env)
+        
+        assert result.returncode == 0
+        lines = (photo_dir / '.checksums').read_text().splitlines()
+        stored = dict(reversed(line.split('  ', 1)) for line in lines)
+        assert stored == {
+            name: hashlib.sha256((photo_dir / name).read_bytes()).hexdigest()
+            for name in ('a.jpg', 'b.jpg', 'c.jpg', 'd.jpg', 'e.jpg')
+        }
 
 
 class TestPgVerifyHelp:
@@ -239,13 +271,12 @@ class TestPgVerifyHelp:
 class TestPgVerifyVerbose:
     """Tests for pg-verify verbose output."""
     
-    @requires_pillow
     def test_verbose_shows_details(self, run_script, tmp_path: Path, test_env):
         """pg-verify --verbose shows detailed output."""
         photo_dir = tmp_path / 'photos'
         photo_dir.mkdir()
         
-        create_jpeg(photo_dir / 'verbose_test.jpg')
+        create_jpeg_fast(photo_dir / 'verbose_test.jpg')
         run_script('pg-verify', str(photo_dir), '--generate')
         
         # Modify to cause failure
@@ -267,7 +298,6 @@ class TestPgVerifyEdgeCases:
         
         assert result.returncode != 0
     
-    @requires_pillow
     def test_empty_directory(self, run_script, tmp_path: Path, test_env):
         """pg-verify handles empty directory."""
         empty_dir = tmp_path / 'empty'
@@ -278,13 +308,12 @@ class TestPgVerifyEdgeCases:
         # Should complete without error
         assert result.returncode == 0
     
-    @requires_pillow
     def test_filename_with_spaces(self, run_script, tmp_path: Path, test_env):
         """pg-verify handles filenames with spaces."""
         photo_dir = tmp_path / 'photos'
         photo_dir.mkdir()
         
-        create_jpeg(photo_dir / 'My Photo Name.jpg')
+        create_jpeg_fast(photo_dir / 'My Photo Name.jpg')
         
         result = run_script('pg-verify', str(photo_dir), '--generate')
         
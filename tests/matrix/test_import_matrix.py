@@ -4,114 +4,129 @@ Tests various combinations of CLI flags, YAML config, and environment settings.
 """
 
 import os
+import shutil
 import subprocess
 from pathlib import Path
 from datetime import datetime
 from itertools import product
+from typing import Dict, Tuple
 
 import pytest
 
-from tests.conftest import requires_exiftool, requires_pillow, requires_imagemagick
+from tests.conftest import (
+    PROJECT_ROOT,
+    requires_exiftool,
+    requires_pillow,
+    requires_imagemagick,
+    list_jpegs,
+    make_test_env,
+    option_matrix_cases,
+)
 from tests.fixtures.photo_factory import (
-    create_sd_card_structure,
     create_import_yaml,
+    create_jpeg_fast,
     get_exif,
 )
 
 
-class TestImportOptionMatrix:
-    """
-    Systematic testing of import option combinations.
-    
-    Options tested:
-    - .import.yaml present/absent
-    - --event CLI flag present/absent
-    - --location CLI flag present/absent
-    - GENERATE_CHECKSUMS env var true/false
-    """
+# Factors of TestImportOptionMatrix: has_yaml, has_cli_event, has_cli_location.
+# GENERATE_CHECKSUMS was a factor too, but no case asserted on it; checksum
+# generation is covered by TestPgImportChecksums in the integration tests.
+IMPORT_OPTION_FACTORS = ([False, True], [False, True], [False, True])
+
+YAML_EVENT = 'YAMLEvent'
+YAML_LOCATION = 'YAMLLocation'
+CLI_EVENT = 'CLIEvent'
+CLI_LOCATION = 'CLILocation'
+
+
+@pytest.fixture(scope='class')
+def batch_import_results(
+    request, tmp_path_factory, sd_card_template: Path, pg_import_server
+) -> Dict[tuple, Tuple[subprocess.CompletedProcess, Path]]:
+    """Import every option combination; map each to (result, archive path)."""
+    combos = option_matrix_cases(request.config, *IMPORT_OPTION_FACTORS)
+    jobs = []
     
-    @requires_exiftool
-    @requires_pillow
-    @pytest.mark.parametrize("has_yaml,has_cli_event,has_cli_location,checksums", [
-        # No YAML, no CLI - minimal (will use defaults)
-        (False, False, False, False),
-        # No YAML, CLI event only
-        (False, True, False, False),
-        # No YAML, CLI event + location
-        (False, True, True, False),
-        # No YAML, CLI event + location + checksums
-        (False, True, True, True),
-        # YAML only (use YAML values)
-        (True, False, False, False),
-        # YAML + CLI event (CLI overrides)
-        (True, True, False, False),
-        # YAML + CLI event + location (CLI overrides)
-        (True, True, True, False),
-        # Full: YAML + CLI + checksums
-        (True, True, True, True),
-    ])
-    def test_import_option_combination(
-        self, run_script, tmp_path: Path, test_env,
-        has_yaml, has_cli_event, has_cli_location, checksums
-    ):
-        """Test specific combination of import options."""
-        # Create SD card
-        sd_card = tmp_path / 'SD_CARD'
-        sd_card.mkdir()
-        create_sd_card_structure(sd_card, num_photos=2)
+    for has_yaml, has_cli_event, has_cli_location in combos:
+        root = tmp_path_factory.mktemp('option_combo')
         
-        # Configure YAML if needed
-        yaml_event = 'YAMLEvent'
-        yaml_location = 'YAMLLocation'
+        # Copy the shared SD card template
+        sd_card = root / 'SD_CARD'
+        shutil.copytree(sd_card_template, sd_card)
         
         if has_yaml:
             create_import_yaml(
                 sd_card,
-                event=yaml_event,
-                location=yaml_location,
+                event=YAML_EVENT,
+                location=YAML_LOCATION,
                 author='YAML Author'
             )
         
         # Build CLI args
         args = [str(sd_card), '--no-delete']
         
-        cli_event = 'CLIEvent'
-        cli_location = 'CLILocation'
-        
         if has_cli_event:
-            args.extend(['--event', cli_event])
+            args.extend(['--event', CLI_EVENT])
         elif not has_yaml:
             # Need some event if no YAML
             args.extend(['--event', 'DefaultEvent'])
         
         if has_cli_location:
-            args.extend(['--location', cli_location])
-        
-        # Configure environment
-        env = test_env.copy()
-        env['GENERATE_CHECKSUMS'] = 'true' if checksums else 'false'
+            args.extend(['--location', CLI_LOCATION])
         
-        # Run import
-        result = run_script('pg-import', *args, env=env)
+        jobs.append((args, make_test_env(root)))
+    
+    results = pg_import_server.call_batch(jobs, timeout=30)
+    
+    return {
+        combo: (result, Path(env['PHOTO_LIBRARY']))
+        for combo, result, (_, env) in zip(combos, results, jobs)
+    }
+
+
+class TestImportOptionMatrix:
+    """
+    Systematic testing of import option combinations.
+    
+    Options tested:
+    - .import.yaml present/absent
+    - --event CLI flag present/absent
+    - --location CLI flag present/absent
+    
+    All combinations are imported in one batch through the pg-import
+    server; the test cases only check the results.
+    """
+    
+    @requires_exiftool
+    @requires_pillow
+    # Pairwise cases by default (4: every pair of values at least once),
+    # full 2x2x2 product with --all-combinations
+    @pytest.mark.option_matrix(
+        "has_yaml,has_cli_event,has_cli_location",
+        *IMPORT_OPTION_FACTORS,
+    )
+    def test_import_option_combination(
+        self, batch_import_results,
+        has_yaml, has_cli_event, has_cli_location
+    ):
+        """Test specific combination of import options."""
+        result, archive_path = batch_import_results[
+            (has_yaml, has_cli_event, has_cli_location)
+        ]
         
         # Basic success check
         assert result.returncode == 0, f"Import failed: {result.stderr}"
         
         # Find imported files
-        archive_path = Path(env['PHOTO_LIBRARY'])
-        imported = list(archive_path.rglob('*.jpg')) + list(archive_path.rglob('*.JPG'))
+        imported = list_jpegs(archive_path)
         
         assert len(imported) >= 1, "No files imported"
         
         # Check expected event in filename
-        expected_event = cli_event if has_cli_event else (yaml_event if has_yaml else 'DefaultEvent')
+        expected_event = CLI_EVENT if has_cli_event else (YAML_EVENT if has_yaml else 'DefaultEvent')
         for f in imported:
             assert expected_event in f.name, f"Expected {expected_event} in {f.name}"
-        
-        # Check checksums
-        if checksums:
-            checksum_files = list(archive_path.rglob('.checksums'))
-            # Checksums might be in subdirectories
 
 
 class TestImportNamingPatternMatrix:
@@ -125,13 +140,12 @@ class TestImportNamingPatternMatrix:
         ('{date}_{seq:04d}', 'date_seq'),
     ])
     def test_naming_pattern(
-        self, run_script, tmp_path: Path, test_env,
+        self, run_script, tmp_path: Path, test_env, sd_card_template: Path,
         pattern, expected_format
     ):
         """Test different naming patterns."""
         sd_card = tmp_path / 'SD_CARD'
-        sd_card.mkdir()
-        create_sd_card_structure(sd_card, num_photos=2)
+        shutil.copytree(sd_card_template, sd_card)
         
         env = test_env.copy()
         env['NAMING_PATTERN'] = pattern
@@ -147,7 +161,7 @@ class TestImportNamingPatternMatrix:
         
         # Verify files exist and match expected format
         archive_path = Path(env['PHOTO_LIBRARY'])
-        imported = list(archive_path.rglob('*.jpg')) + list(archive_path.rglob('*.JPG'))
+        imported = list_jpegs(archive_path)
         
         assert len(imported) >= 1
 
@@ -156,7 +170,6 @@ class TestImportFolderStructureMatrix:
     """Tests for different folder structure configurations."""
     
     @requires_exiftool
-    @requires_pillow
     @pytest.mark.parametrize("structure,depth", [
         ('{year}-{month}-{day}', 1),  # Single folder: 2026-01-24
         ('{year}/{month}/{day}', 3),  # Nested: 2026/01/24
@@ -164,13 +177,12 @@ class TestImportFolderStructureMatrix:
         ('{year}', 1),                # Year only: 2026
     ])
     def test_folder_structure(
-        self, run_script, tmp_path: Path, test_env,
+        self, run_script, tmp_path: Path, test_env, sd_template_factory,
         structure, depth
     ):
         """Test different folder structure patterns."""
         sd_card = tmp_path / 'SD_CARD'
-        sd_card.mkdir()
-        create_sd_card_structure(sd_card, num_photos=2)
+        shutil.copytree(sd_template_factory(2, fast=True), sd_card)
         
         env = test_env.copy()
         env['FOLDER_STRUCTURE'] = structure
@@ -186,7 +198,7 @@ class TestImportFolderStructureMatrix:
         
         # Verify folder depth
         archive_path = Path(env['PHOTO_LIBRARY'])
-        imported = list(archive_path.rglob('*.jpg')) + list(archive_path.rglob('*.JPG'))
+        imported = list_jpegs(archive_path)
         
         assert len(imported) >= 1
         
@@ -202,21 +214,16 @@ class TestImportDryRunMatrix:
     """Matrix tests for dry-run mode across different configurations."""
     
     @requires_exiftool
-    @requires_pillow
-    @pytest.mark.parametrize("has_yaml,verbose", [
-        (False, False),
-        (False, True),
-        (True, False),
-        (True, True),
-    ])
+    # --verbose only changes output volume, not what dry-run creates, so
+    # it is not a factor here
+    @pytest.mark.parametrize("has_yaml", [False, True])
     def test_dry_run_combinations(
-        self, run_script, tmp_path: Path, test_env,
-        has_yaml, verbose
+        self, run_script, tmp_path: Path, test_env, sd_template_factory,
+        has_yaml
     ):
         """Test dry-run with different configurations."""
         sd_card = tmp_path / 'SD_CARD'
-        sd_card.mkdir()
-        create_sd_card_structure(sd_card, num_photos=2)
+        shutil.copytree(sd_template_factory(2, fast=True), sd_card)
         
         if has_yaml:
             create_import_yaml(sd_card, event='DryRunYAML')
@@ -226,9 +233,6 @@ class TestImportDryRunMatrix:
         if not has_yaml:
             args.extend(['--event', 'DryRunTest'])
         
-        if verbose:
-            args.append('--verbose')
-        
         result = run_script('pg-import', *args)
         
         assert result.returncode == 0
@@ -237,7 +241,7 @@ class TestImportDryRunMatrix:
         
         # Verify no files were actually created
         archive_path = Path(test_env['PHOTO_LIBRARY'])
-        imported = list(archive_path.rglob('*.jpg')) + list(archive_path.rglob('*.JPG'))
+        imported = list_jpegs(archive_path)
         assert len(imported) == 0, "Dry-run should not create files"
 
 
@@ -258,10 +262,6 @@ class TestDevelopOptionMatrix:
     ):
         """Test develop with different quality/resize combinations."""
         from tests.fixtures.photo_factory import create_raw_like
-        from tests.conftest import has_imagemagick
-        
-        if not has_imagemagick():
-            pytest.skip("ImageMagick not installed")
         
         raw_file = create_raw_like(tmp_path / 'test.cr3')
         output_dir = tmp_path / 'output'
@@ -285,10 +285,45 @@ class TestDevelopOptionMatrix:
         assert 'Development complete' in output or 'Processing' in output
 
 
+@pytest.fixture(scope='class')
+def prepared_photos(tmp_path_factory) -> Path:
+    """
+    Photo tree with checksums generated once for the whole class.
+    
+    Tests must not modify it; use verify_photos for a private copy.
+    """
+    root = tmp_path_factory.mktemp('verify_photos')
+    base = root / 'photos'
+    sub = base / 'subdir'
+    sub.mkdir(parents=True)
+    
+    create_jpeg_fast(base / 'top.jpg')
+    create_jpeg_fast(sub / 'nested.jpg')
+    
+    # run_script is function-scoped, so call pg-verify directly
+    subprocess.run(
+        [str(PROJECT_ROOT / 'bin' / 'pg-verify'), str(base), '--generate'],
+        env=make_test_env(root),
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=30
+    )
+    
+    return base
+
+
+@pytest.fixture
+def verify_photos(prepared_photos: Path, tmp_path: Path) -> Path:
+    """Per-test copy of prepared_photos, so modes cannot affect each other."""
+    photos = tmp_path / 'photos'
+    shutil.copytree(prepared_photos, photos)
+    return photos
+
+
 class TestVerifyModeMatrix:
     """Matrix tests for pg-verify modes."""
     
-    @requires_pillow
     @pytest.mark.parametrize("mode,recursive", [
         ('generate', True),
         ('generate', False),
@@ -298,26 +333,11 @@ class TestVerifyModeMatrix:
         ('update', False),
     ])
     def test_verify_mode_combinations(
-        self, run_script, tmp_path: Path, test_env,
+        self, run_script, verify_photos: Path,
         mode, recursive
     ):
         """Test verify modes with recursive/non-recursive options."""
-        from tests.fixtures.photo_factory import create_jpeg
-        
-        # Create directory structure
-        base = tmp_path / 'photos'
-        sub = base / 'subdir'
-        base.mkdir()
-        sub.mkdir()
-        
-        create_jpeg(base / 'top.jpg')
-        create_jpeg(sub / 'nested.jpg')
-        
-        # For check/update, we need existing checksums
-        if mode in ('check', 'update'):
-            run_script('pg-verify', str(base), '--generate')
-        
-        args = [str(base), f'--{mode}']
+        args = [str(verify_photos), f'--{mode}']
         
         if not recursive:
             args.append('--no-recursive')
@@ -332,7 +352,6 @@ class TestEdgeCaseMatrix:
     """Matrix tests for edge cases and special characters."""
     
     @requires_exiftool
-    @requires_pillow
     @pytest.mark.parametrize("event_name", [
         'Simple',
         'With Spaces',
@@ -342,13 +361,12 @@ class TestEdgeCaseMatrix:
         'Special@Chars!',
     ])
     def test_event_name_variations(
-        self, run_script, tmp_path: Path, test_env,
+        self, run_script, tmp_path: Path, test_env, sd_template_factory,
         event_name
     ):
         """Test import with various event name formats."""
         sd_card = tmp_path / 'SD_CARD'
-        sd_card.mkdir()
-        create_sd_card_structure(sd_card, num_photos=1)
+        shutil.copytree(sd_template_factory(1, fast=True), sd_card)
         
         result = run_script(
             'pg-import', str(sd_card),
@@ -360,6 +378,6 @@ class TestEdgeCaseMatrix:
         
         # Files should be created (name sanitized)
         archive_path = Path(test_env['PHOTO_LIBRARY'])
-        imported = list(archive_path.rglob('*.jpg')) + list(archive_path.rglob('*.JPG'))
+        imported = list_jpegs(archive_path)
         
         assert len(imported) >= 1
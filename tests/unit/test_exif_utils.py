@@ -11,10 +11,17 @@ import pytest
 # Add lib to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'lib'))
 
-from exif_utils import ExifTool
+from exif_utils import ExifTool, parse_exif_datetime, parse_gps
 
 from tests.conftest import requires_exiftool, requires_pillow
-from tests.fixtures.photo_factory import create_jpeg, create_jpeg_with_date, set_exif, get_exif
+from tests.fixtures.photo_factory import (
+    create_jpeg,
+    create_jpeg_fast,
+    create_jpeg_with_date,
+    create_jpeg_with_date_fast,
+    set_exif,
+    get_exif,
+)
 
 
 class TestExifToolInstantiation:
@@ -34,6 +41,88 @@ class TestExifToolInstantiation:
         assert exif.exiftool_path == 'exiftool'
 
 
+class TestExifToolStayOpen:
+    """Tests for the persistent `exiftool -stay_open` process."""
+    
+    @requires_exiftool
+    @requires_pillow
+    def test_reuses_process_across_calls(self, tmp_path: Path):
+        """Consecutive calls share one exiftool process."""
+        photo = create_jpeg(tmp_path / 'test.jpg')
+        
+        with ExifTool() as exif:
+            exif.read(photo)
+            pid = exif._proc.pid
+            exif.write(photo, author='Stay Open')
+            exif.read(photo)
+            
+            assert exif._proc.pid == pid
+        
+        assert get_exif(photo, 'Artist') == 'Stay Open'
+    
+    @requires_exiftool
+    @requires_pillow
+    def test_context_manager_closes_process(self, tmp_path: Path):
+        """Leaving the with block stops exiftool; the next call restarts it."""
+        photo = create_jpeg(tmp_path / 'test.jpg')
+        
+        with ExifTool() as exif:
+            exif.read(photo)
+            proc = exif._proc
+        
+        assert exif._proc is None
+        assert proc.poll() is not None
+        
+        assert exif.read(photo)['File:FileName'] == 'test.jpg'
+        exif.close()
+    
+    @requires_exiftool
+    @requires_pillow
+    def test_value_with_newline_falls_back(self, tmp_path: Path):
+        """Values the line-based argument stream can't carry still get written."""
+        photo = create_jpeg(tmp_path / 'test.jpg')
+        
+        with ExifTool() as exif:
+            assert exif.write(photo, description='Line one\nLine two')
+
+    
+    def test_unresponsive_process_times_out(self, tmp_path: Path):
+        """A read that never gets an answer is killed instead of hanging."""
+        fake = tmp_path / 'exiftool'
+        fake.write_text('#!/bin/sh\nexec cat > /dev/null\n')
+        fake.chmod(0o755)
+        
+        exif = ExifTool(exiftool_path=str(fake), timeout=0.5)
+        
+        assert exif.read(tmp_path / 'test.jpg') == {}
+        assert exif._proc is None
+        assert exif.read_dates_batch([tmp_path / 'test.jpg']) == ['']
+        exif.close()
+    
+    def test_slow_write_does_not_time_out(self, tmp_path: Path):
+        """Writes print nothing until they finish, so the read timeout skips them."""
+        fake = tmp_path / 'exiftool'
+        fake.write_text(
+            '#!/bin/sh\n'
+            'while read -r line; do\n'
+            '    case "$line" in\n'
+            '        -execute*)\n'
+            '            n=${line#-execute}\n'
+            '            sleep 1\n'
+            '            echo "    1 image files updated"\n'
+            '            echo "{ready$n}"\n'
+            '            echo "0=status$n" >&2\n'
+            '            ;;\n'
+            '    esac\n'
+            'done\n'
+        )
+        fake.chmod(0o755)
+        
+        with ExifTool(exiftool_path=str(fake), timeout=0.2) as exif:
+            assert exif.write(tmp_path / 'test.jpg', author='Slow')
+            assert exif.write_batch([tmp_path / 'test.jpg'], author='Slow') == 1
+
+
 class TestExifToolRead:
     """Tests for ExifTool.read() method."""
     
@@ -85,6 +174,59 @@ class TestExifToolRead:
         assert result == {}
 
 
+class TestExifToolFastRead:
+    """Tests for the -fast read options."""
+    
+    @requires_exiftool
+    def test_fast_read_matches_full_read(self, tmp_path: Path):
+        """read() with the default -fast flag returns the same tags as without."""
+        photo = create_jpeg_with_date_fast(
+            tmp_path / 'test.jpg',
+            date=datetime(2026, 1, 24, 14, 30, 0),
+            camera='Canon EOS R5'
+        )
+        
+        with ExifTool() as fast, ExifTool(fast_flags=[]) as full:
+            assert fast.fast_flags == ['-fast']
+            assert fast.read(photo) == full.read(photo)
+            assert fast.read_dates_batch([photo]) == ['20260124']
+
+
+class TestExifToolReadCache:
+    """Tests for the per-file read() cache."""
+    
+    @requires_exiftool
+    @requires_pillow
+    def test_repeated_reads_use_cache(self, tmp_path: Path):
+        """read_date/read_camera/show after read() don't call exiftool again."""
+        photo = create_jpeg_with_date(
+            tmp_path / 'test.jpg',
+            date=datetime(2026, 1, 24, 14, 30, 0),
+            camera='Canon EOS R5'
+        )
+        
+        with ExifTool() as exif:
+            exif.read(photo)
+            commands = exif._seq
+            exif.read_date(photo)
+            exif.read_camera(photo)
+            exif.show(photo)
+            
+            assert exif._seq == commands
+    
+    @requires_exiftool
+    @requires_pillow
+    def test_write_invalidates_cache(self, tmp_path: Path):
+        """read() after write() returns the new values."""
+        photo = create_jpeg(tmp_path / 'test.jpg')
+        
+        with ExifTool() as exif:
+            exif.read(photo)
+            exif.write(photo, author='Cached Author')
+            
+            assert exif.read(photo).get('EXIF:Artist') == 'Cached Author'
+
+
 class TestExifToolReadDate:
     """Tests for ExifTool.read_date() method."""
     
@@ -116,6 +258,44 @@ class TestExifToolReadDate:
         # Depends on exiftool behavior
 
 
+class TestParseExifDatetime:
+    """Tests for parse_exif_datetime()."""
+    
+    @pytest.mark.parametrize("value,expected", [
+        ('2026:01:24 14:30:00', datetime(2026, 1, 24, 14, 30, 0)),
+        ('2026:01:24 14:30:00+01:00', datetime(2026, 1, 24, 14, 30, 0)),
+        ('2026:1:5 1:2:3', datetime(2026, 1, 5, 1, 2, 3)),
+        ('0000:00:00 00:00:00', None),
+        ('2026:02:30 10:00:00', None),
+        ('2026-01-24 14:30:00', None),
+        ('2026:01:24', None),
+        ('', None),
+    ])
+    def test_matches_strptime(self, value, expected):
+        """parse_exif_datetime accepts exactly what strptime accepted."""
+        assert parse_exif_datetime(value) == expected
+
+
+class TestParseGps:
+    """Tests for parse_gps()."""
+    
+    @pytest.mark.parametrize("value,expected", [
+        ('52.52,13.405', (52.52, 13.405)),
+        (' -33.86 , 151.21 ', (-33.86, 151.21)),
+        ('+45,-73', (45.0, -73.0)),
+        ('90,180', (90.0, 180.0)),
+        ('91,0', None),
+        ('0,-181', None),
+        ('52.52', None),
+        ('52.52,13.405,7', None),
+        ('north,east', None),
+        ('', None),
+    ])
+    def test_parses_decimal_degrees(self, value, expected):
+        """parse_gps accepts in-range "lat,lon" and rejects anything else."""
+        assert parse_gps(value) == expected
+
+
 class TestExifToolReadCamera:
     """Tests for ExifTool.read_camera() method."""
     
@@ -268,6 +448,35 @@ class TestExifToolWriteBatch:
         for photo in photos:
             assert get_exif(photo, 'Artist') == 'Batch Author'
     
+    @requires_exiftool
+    @requires_pillow
+    def test_write_batch_multiline_value(self, tmp_path: Path):
+        """write_batch() writes values that can't go through the argument stream."""
+        photos = [
+            create_jpeg(tmp_path / f'photo_{i}.jpg')
+            for i in range(3)
+        ]
+        
+        with ExifTool() as exif:
+            count = exif.write_batch(photos, description='Line one\nLine two')
+        
+        assert count == 3
+    
+    @requires_exiftool
+    def test_write_batch_parallel_workers(self, tmp_path: Path):
+        """write_batch() splits large batches over several exiftool workers."""
+        photos = [
+            create_jpeg_fast(tmp_path / f'photo_{i:03d}.jpg')
+            for i in range(2 * ExifTool._MIN_FILES_PER_WORKER)
+        ]
+        
+        with ExifTool() as exif:
+            count = exif.write_batch(photos, workers=2, author='Pool Author')
+        
+        assert count == len(photos)
+        assert get_exif(photos[0], 'Artist') == 'Pool Author'
+        assert get_exif(photos[-1], 'Artist') == 'Pool Author'
+    
     @requires_exiftool
     @requires_pillow
     def test_write_batch_empty_list(self):
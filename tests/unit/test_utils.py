@@ -1,50 +1,30 @@
 """
 Unit tests for lib/utils.sh utility functions.
-Tests are run via subprocess calls to Bash scripts.
+All tests share one Bash session with the libs sourced (bash_query fixture).
 """
 
-import os
-import subprocess
 from pathlib import Path
 
 import pytest
 
 
+NON_INTERACTIVE = {'PG_NON_INTERACTIVE': '1'}
+
+
 class TestSanitizeFilename:
     """Tests for sanitize_filename() function."""
     
-    def test_removes_spaces(self, project_root: Path, tmp_path: Path):
+    def test_removes_spaces(self, bash_query):
         """sanitize_filename replaces spaces with underscores."""
-        test_script = tmp_path / 'test_sanitize.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(sanitize_filename "My Photo Name")
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run('echo "result=$(sanitize_filename "My Photo Name")"')
         
         assert result.returncode == 0
         assert 'result=My_Photo_Name' in result.stdout
     
-    def test_removes_special_characters(self, project_root: Path, tmp_path: Path):
+    def test_removes_special_characters(self, bash_query):
         """sanitize_filename removes special characters."""
-        test_script = tmp_path / 'test_sanitize.sh'
-        # Use raw string to avoid escape sequence issues
-        script_content = '''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{root}"
-source "{root}/lib/utils.sh"
-result=$(sanitize_filename "Photo@#$%^&*()")
-echo "result=$result"
-'''.format(root=project_root)
-        test_script.write_text(script_content)
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        # Raw string: keep the shell metacharacters as they are
+        result = bash_query.run(r'echo "result=$(sanitize_filename "Photo@#\$%^&*()")"')
         
         assert result.returncode == 0
         # Should only contain alphanumeric, dash, underscore, period
@@ -53,36 +33,16 @@ echo "result=$result"
         assert '@' not in output
         assert '#' not in output
     
-    def test_preserves_valid_characters(self, project_root: Path, tmp_path: Path):
+    def test_preserves_valid_characters(self, bash_query):
         """sanitize_filename preserves valid characters."""
-        test_script = tmp_path / 'test_sanitize.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(sanitize_filename "Valid-Name_123.test")
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run('echo "result=$(sanitize_filename "Valid-Name_123.test")"')
         
         assert result.returncode == 0
         assert 'result=Valid-Name_123.test' in result.stdout
     
-    def test_collapses_multiple_underscores(self, project_root: Path, tmp_path: Path):
+    def test_collapses_multiple_underscores(self, bash_query):
         """sanitize_filename collapses multiple underscores."""
-        test_script = tmp_path / 'test_sanitize.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(sanitize_filename "Photo   Multiple   Spaces")
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run('echo "result=$(sanitize_filename "Photo   Multiple   Spaces")"')
         
         assert result.returncode == 0
         output = result.stdout
@@ -93,53 +53,23 @@ echo "result=$result"
 class TestPadNumber:
     """Tests for pad_number() function."""
     
-    def test_pads_single_digit(self, project_root: Path, tmp_path: Path):
+    def test_pads_single_digit(self, bash_query):
         """pad_number pads single digit to specified width."""
-        test_script = tmp_path / 'test_pad.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(pad_number 5 3)
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run('echo "result=$(pad_number 5 3)"')
         
         assert result.returncode == 0
         assert 'result=005' in result.stdout
     
-    def test_pads_double_digit(self, project_root: Path, tmp_path: Path):
+    def test_pads_double_digit(self, bash_query):
         """pad_number pads double digit correctly."""
-        test_script = tmp_path / 'test_pad.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(pad_number 42 4)
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run('echo "result=$(pad_number 42 4)"')
         
         assert result.returncode == 0
         assert 'result=0042' in result.stdout
     
-    def test_no_padding_when_larger(self, project_root: Path, tmp_path: Path):
+    def test_no_padding_when_larger(self, bash_query):
         """pad_number doesn't truncate larger numbers."""
-        test_script = tmp_path / 'test_pad.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(pad_number 12345 3)
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run('echo "result=$(pad_number 12345 3)"')
         
         assert result.returncode == 0
         assert 'result=12345' in result.stdout
@@ -148,36 +78,16 @@ echo "result=$result"
 class TestGetExtension:
     """Tests for get_extension() function."""
     
-    def test_extracts_extension(self, project_root: Path, tmp_path: Path):
+    def test_extracts_extension(self, bash_query):
         """get_extension returns lowercase extension."""
-        test_script = tmp_path / 'test_ext.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(get_extension "photo.JPG")
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run('echo "result=$(get_extension "photo.JPG")"')
         
         assert result.returncode == 0
         assert 'result=jpg' in result.stdout
     
-    def test_handles_multiple_dots(self, project_root: Path, tmp_path: Path):
+    def test_handles_multiple_dots(self, bash_query):
         """get_extension handles files with multiple dots."""
-        test_script = tmp_path / 'test_ext.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(get_extension "photo.2026.01.24.CR3")
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run('echo "result=$(get_extension "photo.2026.01.24.CR3")"')
         
         assert result.returncode == 0
         assert 'result=cr3' in result.stdout
@@ -186,36 +96,16 @@ echo "result=$result"
 class TestGetBasename:
     """Tests for get_basename() function."""
     
-    def test_extracts_basename(self, project_root: Path, tmp_path: Path):
+    def test_extracts_basename(self, bash_query):
         """get_basename returns filename without extension."""
-        test_script = tmp_path / 'test_base.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(get_basename "photo.jpg")
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run('echo "result=$(get_basename "photo.jpg")"')
         
         assert result.returncode == 0
         assert 'result=photo' in result.stdout
     
-    def test_handles_path(self, project_root: Path, tmp_path: Path):
+    def test_handles_path(self, bash_query):
         """get_basename handles full path."""
-        test_script = tmp_path / 'test_base.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(get_basename "/path/to/photo.jpg")
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run('echo "result=$(get_basename "/path/to/photo.jpg")"')
         
         assert result.returncode == 0
         assert 'result=photo' in result.stdout
@@ -224,22 +114,12 @@ echo "result=$result"
 class TestGenerateChecksum:
     """Tests for generate_checksum() function."""
     
-    def test_sha256_checksum(self, project_root: Path, tmp_path: Path):
+    def test_sha256_checksum(self, bash_query, tmp_path: Path):
         """generate_checksum produces sha256 hash."""
         test_file = tmp_path / 'test.txt'
         test_file.write_text('test content')
         
-        test_script = tmp_path / 'test_checksum.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(generate_checksum "{test_file}" "sha256")
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run(f'echo "result=$(generate_checksum "{test_file}" "sha256")"')
         
         assert result.returncode == 0
         # SHA256 hash is 64 hex characters
@@ -248,22 +128,12 @@ echo "result=$result"
         hash_value = output.split('result=')[1]
         assert len(hash_value) == 64
     
-    def test_md5_checksum(self, project_root: Path, tmp_path: Path):
+    def test_md5_checksum(self, bash_query, tmp_path: Path):
         """generate_checksum produces md5 hash."""
         test_file = tmp_path / 'test.txt'
         test_file.write_text('test content')
         
-        test_script = tmp_path / 'test_checksum.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-result=$(generate_checksum "{test_file}" "md5")
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run(f'echo "result=$(generate_checksum "{test_file}" "md5")"')
         
         assert result.returncode == 0
         # MD5 hash is 32 hex characters
@@ -271,19 +141,60 @@ echo "result=$result"
         assert 'result=' in output
         hash_value = output.split('result=')[1]
         assert len(hash_value) == 32
+    
+    def test_checksum_list_matches_single(self, bash_query, tmp_path: Path):
+        """generate_checksum_list prints one checksum per file, in order."""
+        files = []
+        for name in ['b.txt', 'a.txt', 'back\\slash.txt']:
+            test_file = tmp_path / name
+            test_file.write_text(f'content of {name}')
+            files.append(test_file)
+        
+        quoted = ' '.join(f'"{f}"' for f in files)
+        result = bash_query.run(f'''
+generate_checksum_list "sha256" {quoted}
+for f in {quoted}; do
+    echo "single=$(generate_checksum "$f" "sha256")"
+done
+''')
+        
+        assert result.returncode == 0
+        lines = result.stdout.split()
+        assert lines[:3] == [l.split('=')[1] for l in lines[3:]]
+
+
+class TestSafeCopy:
+    """Tests for get_file_size() and safe_copy() functions."""
+    
+    def test_get_file_size(self, bash_query, tmp_path: Path):
+        """get_file_size returns the size in bytes."""
+        test_file = tmp_path / 'test.txt'
+        test_file.write_text('test content')
+        
+        result = bash_query.run(f'echo "result=$(get_file_size "{test_file}")"')
+        
+        assert result.returncode == 0
+        assert 'result=12' in result.stdout
+    
+    def test_copies_and_verifies(self, bash_query, tmp_path: Path):
+        """safe_copy copies the file and passes verification."""
+        source = tmp_path / 'source.jpg'
+        source.write_bytes(b'\xff\xd8' + b'x' * 1000)
+        dest = tmp_path / 'dest.jpg'
+        
+        result = bash_query.run(f'safe_copy "{source}" "{dest}" "true" && echo "copied"')
+        
+        assert result.returncode == 0
+        assert 'copied' in result.stdout
+        assert dest.read_bytes() == source.read_bytes()
 
 
 class TestMapFunctions:
     """Tests for Bash 3.2 compatible map_* functions."""
     
-    def test_map_set_and_get(self, project_root: Path, tmp_path: Path):
+    def test_map_set_and_get(self, bash_query):
         """map_set and map_get work together."""
-        test_script = tmp_path / 'test_map.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-
+        result = bash_query.run('''
 mymap=$(map_init)
 trap "map_cleanup '$mymap'" EXIT
 
@@ -296,22 +207,14 @@ result2=$(map_get "$mymap" "key2")
 echo "result1=$result1"
 echo "result2=$result2"
 ''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
         
         assert result.returncode == 0
         assert 'result1=value1' in result.stdout
         assert 'result2=value2' in result.stdout
     
-    def test_map_has(self, project_root: Path, tmp_path: Path):
+    def test_map_has(self, bash_query):
         """map_has correctly detects key presence."""
-        test_script = tmp_path / 'test_map.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
-
+        result = bash_query.run('''
 mymap=$(map_init)
 trap "map_cleanup '$mymap'" EXIT
 
@@ -329,22 +232,34 @@ else
     echo "has_missing=false"
 fi
 ''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
         
         assert result.returncode == 0
         assert 'has_exists=true' in result.stdout
         assert 'has_missing=false' in result.stdout
     
-    def test_map_incr(self, project_root: Path, tmp_path: Path):
-        """map_incr increments numeric values."""
-        test_script = tmp_path / 'test_map.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-source "{project_root}/lib/utils.sh"
+    def test_map_keys_match_literally(self, bash_query):
+        """map_* treat keys as literal strings, not patterns."""
+        result = bash_query.run('''
+mymap=$(map_init)
+trap "map_cleanup '$mymap'" EXIT
+
+map_set "$mymap" "/photos/2026.01[1]" "dir"
+map_set "$mymap" "/photos/2026x01[1]" "other"
+map_set "$mymap" "/photos/2026.01[1]" "updated"
 
+echo "result=$(map_get "$mymap" "/photos/2026.01[1]")"
+map_has "$mymap" "/photos/2026.01" && echo "has_prefix=true" || echo "has_prefix=false"
+echo "lines=$(wc -l < "$mymap" | tr -d ' ')"
+''')
+        
+        assert result.returncode == 0
+        assert 'result=updated' in result.stdout
+        assert 'has_prefix=false' in result.stdout
+        assert 'lines=2' in result.stdout
+    
+    def test_map_incr(self, bash_query):
+        """map_incr increments numeric values."""
+        result = bash_query.run('''
 mymap=$(map_init)
 trap "map_cleanup '$mymap'" EXIT
 
@@ -357,9 +272,6 @@ echo "result1=$result1"
 echo "result2=$result2"
 echo "result3=$result3"
 ''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
         
         assert result.returncode == 0
         assert 'result1=1' in result.stdout
@@ -370,46 +282,22 @@ echo "result3=$result3"
 class TestConfirmNonInteractive:
     """Tests for confirm() in non-interactive mode."""
     
-    def test_confirm_returns_default_yes(self, project_root: Path, tmp_path: Path):
+    def test_confirm_returns_default_yes(self, bash_query):
         """confirm() returns true when default is 'y' in non-interactive mode."""
-        test_script = tmp_path / 'test_confirm.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-export PG_NON_INTERACTIVE=1
-source "{project_root}/lib/utils.sh"
-
-if confirm "Test?" "y"; then
-    echo "confirmed=true"
-else
-    echo "confirmed=false"
-fi
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run(
+            'if confirm "Test?" "y"; then echo "confirmed=true"; else echo "confirmed=false"; fi',
+            env=NON_INTERACTIVE
+        )
         
         assert result.returncode == 0
         assert 'confirmed=true' in result.stdout
     
-    def test_confirm_returns_default_no(self, project_root: Path, tmp_path: Path):
+    def test_confirm_returns_default_no(self, bash_query):
         """confirm() returns false when default is 'n' in non-interactive mode."""
-        test_script = tmp_path / 'test_confirm.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-export PG_NON_INTERACTIVE=1
-source "{project_root}/lib/utils.sh"
-
-if confirm "Test?" "n"; then
-    echo "confirmed=true"
-else
-    echo "confirmed=false"
-fi
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run(
+            'if confirm "Test?" "n"; then echo "confirmed=true"; else echo "confirmed=false"; fi',
+            env=NON_INTERACTIVE
+        )
         
         assert result.returncode == 0
         assert 'confirmed=false' in result.stdout
@@ -418,21 +306,12 @@ fi
 class TestPromptInputNonInteractive:
     """Tests for prompt_input() in non-interactive mode."""
     
-    def test_prompt_input_returns_default(self, project_root: Path, tmp_path: Path):
+    def test_prompt_input_returns_default(self, bash_query):
         """prompt_input() returns default value in non-interactive mode."""
-        test_script = tmp_path / 'test_prompt.sh'
-        test_script.write_text(f'''#!/usr/bin/env bash
-set -euo pipefail
-export PIXELGROOMER_ROOT="{project_root}"
-export PG_NON_INTERACTIVE=1
-source "{project_root}/lib/utils.sh"
-
-result=$(prompt_input "Enter value" "default_value")
-echo "result=$result"
-''')
-        test_script.chmod(0o755)
-        
-        result = subprocess.run([str(test_script)], capture_output=True, text=True)
+        result = bash_query.run(
+            'echo "result=$(prompt_input "Enter value" "default_value")"',
+            env=NON_INTERACTIVE
+        )
         
         assert result.returncode == 0
         assert 'result=default_value' in result.stdout